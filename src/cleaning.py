@@ -6,12 +6,48 @@ Transformaciones seguras, trazables y reproducibles.
 import pandas as pd
 import numpy as np
 import unicodedata
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columnas de texto respaldadas por Arrow cuando pyarrow está disponible
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = 'string[pyarrow]'
+except ImportError:
+    TEXT_DTYPE = 'string'
+
+# Backend opcional para clean_data_pipeline_polars
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+
+def _build_accent_table() -> Dict[int, str]:
+    """Tabla de traducción Latin-1 acentuado -> ASCII (á->a, Ñ->N, ü->u...)."""
+    table = {}
+    for code in range(0xC0, 0x100):
+        char = chr(code)
+        base = ''.join(c for c in unicodedata.normalize('NFD', char) if unicodedata.category(c) != 'Mn')
+        if base != char and base.isascii():
+            table[code] = base
+    return str.maketrans(table)
+
+
+# Estructuras constantes, construidas una vez al importar el módulo
+_ACCENT_TABLE = _build_accent_table()
+_WS_PATTERN = r'\s+'
+
+
+def _count_nulls(df: pd.DataFrame) -> int:
+    """Total de nulos del DataFrame en una sola reducción NumPy."""
+    return int(df.isna().to_numpy().sum())
+
 
 class CleaningLog:
     """Registro detallado de operaciones de limpieza."""
@@ -28,23 +64,27 @@ class CleaningLog:
             'details': details
         })
     
-    def set_before_stats(self, df: pd.DataFrame):
-        """Captura estadísticas antes de limpieza."""
-        self.before_stats = {
+    @staticmethod
+    def _frame_stats(df: pd.DataFrame, n_dups: int = None, n_nulls: int = None) -> Dict[str, int]:
+        """Estadísticas de un DataFrame; reutiliza conteos ya conocidos."""
+        if n_dups is None:
+            n_dups = int(df.duplicated().sum())
+        if n_nulls is None:
+            n_nulls = _count_nulls(df)
+        return {
             'n_rows': len(df),
             'n_cols': len(df.columns),
-            'duplicados': df.duplicated().sum(),
-            'nulos_totales': df.isnull().sum().sum()
+            'duplicados': n_dups,
+            'nulos_totales': n_nulls
         }
     
-    def set_after_stats(self, df: pd.DataFrame):
+    def set_before_stats(self, df: pd.DataFrame, n_dups: int = None, n_nulls: int = None):
+        """Captura estadísticas antes de limpieza."""
+        self.before_stats = self._frame_stats(df, n_dups, n_nulls)
+    
+    def set_after_stats(self, df: pd.DataFrame, n_dups: int = None, n_nulls: int = None):
         """Captura estadísticas después de limpieza."""
-        self.after_stats = {
-            'n_rows': len(df),
-            'n_cols': len(df.columns),
-            'duplicados': df.duplicated().sum(),
-            'nulos_totales': df.isnull().sum().sum()
-        }
+        self.after_stats = self._frame_stats(df, n_dups, n_nulls)
     
     def to_dataframe(self) -> pd.DataFrame:
         """Convierte el log a DataFrame para exportar."""
@@ -98,8 +138,19 @@ def remove_accents(text: str) -> str:
     if pd.isna(text):
         return text
     
-    # Normalizar a NFD (descomponer caracteres con diacríticos)
-    nfd = unicodedata.normalize('NFD', str(text))
+    return _remove_accents_cached(str(text))
+
+
+@functools.lru_cache(maxsize=None)
+def _remove_accents_cached(text: str) -> str:
+    """Versión memoizada de remove_accents para strings ya validados."""
+    # Caso común (español): tabla de traducción Latin-1, una sola llamada en C
+    result = text.translate(_ACCENT_TABLE)
+    if result.isascii():
+        return result
+    
+    # Caracteres fuera de Latin-1: normalizar a NFD (descomponer diacríticos)
+    nfd = unicodedata.normalize('NFD', result)
     # Filtrar solo caracteres que no son marcas diacríticas
     return ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
 
@@ -115,28 +166,53 @@ def normalize_string_column(series: pd.Series, remove_acc: bool = True) -> pd.Se
     Returns:
         Serie normalizada.
     """
-    # Convertir a string
-    result = series.astype(str)
-    
-    # Eliminar espacios extra al inicio/fin
-    result = result.str.strip()
-    
-    # Eliminar múltiples espacios consecutivos
-    result = result.str.replace(r'\s+', ' ', regex=True)
-    
-    # Capitalizar primera letra de cada palabra
-    result = result.str.title()
-    
-    # Eliminar acentos si se especifica
+    # Convertir a string, limpiar espacios (inicio/fin y consecutivos) y
+    # capitalizar en una sola cadena, sin resultados intermedios. El patrón
+    # va como string: un re.Pattern compilado obliga a pandas a usar el
+    # camino de Python por elemento en lugar del kernel de Arrow
+    result = (
+        series.astype(TEXT_DTYPE)
+        .str.strip()
+        .str.replace(_WS_PATTERN, ' ', regex=True)
+        .str.title()
+    )
+    
+    # Reemplazar 'Nan' por nulo real
+    result = result.mask(result.eq('Nan'))
+    
+    # Eliminar acentos si se especifica: se procesan solo los valores únicos
+    # y luego se reconstruye la columna a partir de los códigos
     if remove_acc:
-        result = result.apply(remove_accents)
-    
-    # Reemplazar 'Nan' por NaN real
-    result = result.replace('Nan', np.nan)
+        codes, uniques = pd.factorize(result, sort=False)
+        # El elemento final cubre el código -1 (nulos)
+        mapped = np.array([remove_accents(u) for u in uniques] + [pd.NA], dtype=object)
+        result = pd.Series(mapped[codes], index=series.index, name=series.name, dtype=TEXT_DTYPE)
     
     return result
 
 
+def _normalize_one(series: pd.Series, remove_accents_flag: bool) -> Tuple[pd.Series, int]:
+    """Normaliza una columna vía su diccionario de únicos; devuelve (serie, n_cambios)."""
+    # Normalizar solo el diccionario de valores únicos (K << N filas);
+    # factorize agrupa por hash, sin ordenar ni copiar la columna original
+    orig_codes, orig_uniques = pd.factorize(series, sort=False)
+    uniques = pd.Series(orig_uniques)
+    new_uniques = normalize_string_column(uniques, remove_acc=remove_accents_flag)
+    
+    # Contar cambios: filas cuyo valor original se modificó (comparando códigos);
+    # los únicos se comparan como texto, ya que la columna puede mezclar tipos
+    changed = (new_uniques != uniques.astype(TEXT_DTYPE)).fillna(True).to_numpy(dtype=bool)
+    valid = orig_codes >= 0
+    counts = np.bincount(orig_codes[valid], minlength=len(uniques))
+    n_changed = int(counts[changed].sum())
+    
+    # Reconstruir la columna (valores iguales tras normalizar se fusionan)
+    new_codes, merged = pd.factorize(new_uniques)
+    codes = np.full(len(orig_codes), -1, dtype=np.intp)
+    codes[valid] = new_codes[orig_codes[valid]]
+    return pd.Series(merged.array.take(codes, allow_fill=True), index=series.index), n_changed
+
+
 def normalize_categorical_columns(
     df: pd.DataFrame,
     columns: List[str],
@@ -153,23 +229,33 @@ def normalize_categorical_columns(
     Returns:
         Tupla (DataFrame procesado, diccionario con conteos de cambios).
     """
-    df_clean = df.copy()
-    changes = {}
-    
+    present = []
     for col in columns:
-        if col not in df_clean.columns:
-            logger.warning(f"Columna {col} no existe, se omite normalización")
+        if col not in df.columns:
+            logger.warning("Columna %s no existe, se omite normalización", col)
             continue
-        
-        original = df_clean[col].copy()
-        df_clean[col] = normalize_string_column(df_clean[col], remove_acc=remove_accents_flag)
-        
-        # Contar cambios
-        n_changed = (original != df_clean[col]).sum()
+        present.append(col)
+    
+    # Columnas independientes: las operaciones .str de pandas/Arrow liberan
+    # el GIL, así que se reparten entre hilos (sin copiar datos entre procesos)
+    series = [df[col] for col in present]
+    if len(series) > 1:
+        with ThreadPoolExecutor() as executor:
+            results = list(executor.map(
+                lambda s: _normalize_one(s, remove_accents_flag), series
+            ))
+    else:
+        results = [_normalize_one(s, remove_accents_flag) for s in series]
+    
+    normalized = {}
+    changes = {}
+    for col, (new_col, n_changed) in zip(present, results):
+        normalized[col] = new_col
         changes[col] = n_changed
-        
         if n_changed > 0:
-            logger.info(f"  Columna {col}: {n_changed} valores normalizados")
+            logger.info("  Columna %s: %d valores normalizados", col, n_changed)
+    
+    df_clean = df.assign(**normalized)
     
     return df_clean, changes
 
@@ -191,7 +277,17 @@ def remove_duplicates(
         Tupla (DataFrame sin duplicados, número de duplicados removidos).
     """
     n_before = len(df)
-    df_clean = df.drop_duplicates(subset=subset, keep=keep)
+    cols = list(subset) if subset else list(df.columns)
+    
+    # Un hash uint64 por fila en lugar de comparar columna a columna; solo las
+    # filas con hash repetido (candidatas) se comparan de forma exacta, así una
+    # colisión nunca elimina filas distintas
+    row_hash = pd.util.hash_pandas_object(df[cols], index=False)
+    candidates = row_hash.duplicated(keep=False).to_numpy()
+    mask = np.ones(n_before, dtype=bool)
+    if candidates.any():
+        mask[candidates] = ~df.loc[candidates, cols].duplicated(keep=keep).to_numpy()
+    df_clean = df[mask]
     n_removed = n_before - len(df_clean)
     
     if n_removed > 0:
@@ -217,18 +313,27 @@ def handle_missing_values(
         Tupla (DataFrame procesado, número de filas removidas).
     """
     n_before = len(df)
-    df_clean = df.copy()
+    df_clean = df
     
     cols_to_check = columns if columns else df.columns
     
     if strategy == 'drop':
         df_clean = df_clean.dropna(subset=cols_to_check)
     elif strategy == 'fill_mode':
+        # Moda por conteo hash (value_counts) en lugar de mode(), que ordena;
+        # todas las columnas se rellenan en una sola llamada a fillna
+        # Columnas de texto: object o string (el pipeline deja TEXT_DTYPE)
+        fill_map = {}
         for col in cols_to_check:
-            if col in df_clean.columns and df_clean[col].dtype == 'object':
-                mode_val = df_clean[col].mode()
-                if len(mode_val) > 0:
-                    df_clean[col].fillna(mode_val[0], inplace=True)
+            if col in df_clean.columns and (
+                pd.api.types.is_object_dtype(df_clean[col].dtype)
+                or pd.api.types.is_string_dtype(df_clean[col].dtype)
+            ):
+                counts = df_clean[col].value_counts(dropna=True)
+                if len(counts) > 0:
+                    fill_map[col] = counts.index[0]
+        if fill_map:
+            df_clean = df_clean.fillna(value=fill_map)
     
     n_removed = n_before - len(df_clean)
     
@@ -259,12 +364,64 @@ def filter_by_domain(
         return df, 0
     
     n_before = len(df)
-    df_clean = df[df[column].isin(allowed_values) | df[column].isna()].copy()
+    # Una sola pasada de isin; la máscara se reutiliza para reportar inválidos
+    is_null = df[column].isna()
+    mask = df[column].isin(pd.Index(allowed_values)) | is_null
+    df_clean = df[mask]
     n_removed = n_before - len(df_clean)
     
     if n_removed > 0:
-        invalid_vals = df[~df[column].isin(allowed_values) & ~df[column].isna()][column].unique()
-        logger.warning(f"  Columna {column}: {n_removed} filas removidas por valores fuera del dominio: {list(invalid_vals)}")
+        if logger.isEnabledFor(logging.WARNING):
+            invalid_vals = df.loc[~mask & ~is_null, column].unique()
+            logger.warning("  Columna %s: %d filas removidas por valores fuera del dominio: %s",
+                           column, n_removed, list(invalid_vals))
+    
+    return df_clean, n_removed
+
+
+def filter_raw_by_domain(
+    df: pd.DataFrame,
+    column: str,
+    allowed_values: List[str],
+    remove_accents_flag: bool = False
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Filtra por dominio una columna aún sin normalizar.
+    
+    Cada valor se compara en su forma normalizada (normalize_string_column),
+    calculada solo sobre el diccionario de valores únicos, de modo que el
+    resultado coincide con normalizar primero y luego usar filter_by_domain.
+    
+    Args:
+        df: DataFrame a filtrar.
+        column: Columna a validar.
+        allowed_values: Valores permitidos (ya normalizados).
+        remove_accents_flag: Si True, la normalización elimina acentos.
+        
+    Returns:
+        Tupla (DataFrame filtrado, número de filas removidas).
+    """
+    if column not in df.columns:
+        logger.warning(f"Columna {column} no existe")
+        return df, 0
+    
+    codes, uniques = pd.factorize(df[column], sort=False)
+    normalized = normalize_string_column(pd.Series(uniques), remove_acc=remove_accents_flag)
+    valid_uniques = (normalized.isin(pd.Index(allowed_values)) | normalized.isna()).to_numpy(dtype=bool)
+    
+    # Código -1 (nulo original): se conserva, igual que en filter_by_domain
+    mask = np.ones(len(codes), dtype=bool)
+    present = codes >= 0
+    mask[present] = valid_uniques[codes[present]]
+    
+    df_clean = df[mask]
+    n_removed = len(df) - len(df_clean)
+    
+    if n_removed > 0:
+        if logger.isEnabledFor(logging.WARNING):
+            invalid_vals = normalized[~valid_uniques].unique()
+            logger.warning("  Columna %s: %d filas removidas por valores fuera del dominio: %s",
+                           column, n_removed, list(invalid_vals))
     
     return df_clean, n_removed
 
@@ -290,22 +447,21 @@ def clean_data_pipeline(
     cleaning_log = CleaningLog()
     cleaning_log.set_before_stats(df)
     
-    df_clean = df.copy()
-    
-    # 1. Normalizar columnas de texto
-    logger.info("Paso 1: Normalizando columnas de texto")
-    text_columns = [col for col in df_clean.columns if df_clean[col].dtype == 'object']
-    df_clean, changes = normalize_categorical_columns(df_clean, text_columns, remove_accents_flag=False)
-    cleaning_log.log_operation('Normalización de texto', {
-        'columnas_procesadas': len(text_columns),
-        'valores_modificados': sum(changes.values())
-    })
+    # Columnas de texto como strings (Arrow si está disponible) antes de limpiar
+    text_columns = df.select_dtypes(include=['object', 'string']).columns.tolist()
+    df_clean = df.astype({col: TEXT_DTYPE for col in text_columns})
     
-    # 2. Validar y filtrar dominios
-    logger.info("Paso 2: Validando dominios")
+    # 1. Validar y filtrar dominios antes de normalizar, para que la
+    # normalización procese solo las filas que sobreviven
+    logger.info("Paso 1: Validando dominios")
     total_removed_domain = 0
     for domain_col, allowed_vals in config['domains'].items():
-        if domain_col in df_clean.columns:
+        if domain_col in text_columns:
+            # Columna de texto: se compara su forma normalizada (paso 2)
+            df_clean, n_removed = filter_raw_by_domain(df_clean, domain_col, allowed_vals)
+            total_removed_domain += n_removed
+        elif domain_col in df_clean.columns:
+            # El paso 2 no normaliza esta columna: comparación directa
             df_clean, n_removed = filter_by_domain(df_clean, domain_col, allowed_vals)
             total_removed_domain += n_removed
     
@@ -313,6 +469,14 @@ def clean_data_pipeline(
         'registros_removidos': total_removed_domain
     })
     
+    # 2. Normalizar columnas de texto
+    logger.info("Paso 2: Normalizando columnas de texto")
+    df_clean, changes = normalize_categorical_columns(df_clean, text_columns, remove_accents_flag=False)
+    cleaning_log.log_operation('Normalización de texto', {
+        'columnas_procesadas': len(text_columns),
+        'valores_modificados': sum(changes.values())
+    })
+    
     # 3. Eliminar duplicados
     logger.info("Paso 3: Eliminando duplicados")
     if key_columns:
@@ -332,7 +496,115 @@ def clean_data_pipeline(
         'registros_removidos': n_nulls
     })
     
-    cleaning_log.set_after_stats(df_clean)
+    # Tras deduplicar y eliminar nulos ambos conteos son 0 por construcción
+    cleaning_log.set_after_stats(df_clean, n_dups=0, n_nulls=0)
+    
+    logger.info(f"Pipeline de limpieza finalizado: {len(df)} -> {len(df_clean)} registros")
+    
+    return df_clean, cleaning_log
+
+
+def clean_data_pipeline_polars(
+    df: pd.DataFrame,
+    config: Dict[str, Any],
+    key_columns: List[str] = None
+) -> Tuple[pd.DataFrame, CleaningLog]:
+    """
+    Pipeline de limpieza equivalente a clean_data_pipeline sobre Polars.
+    Los cuatro pasos se expresan como un único plan perezoso (LazyFrame)
+    que se ejecuta una sola vez, sin DataFrames intermedios. El orden de
+    los pasos y los conteos del CleaningLog son los mismos que en pandas.
+    
+    Args:
+        df: DataFrame crudo.
+        config: Diccionario de configuración.
+        key_columns: Columnas clave para detección de duplicados.
+        
+    Returns:
+        Tupla (DataFrame limpio, CleaningLog con trazabilidad).
+        
+    Raises:
+        ImportError: Si polars no está instalado.
+    """
+    if pl is None:
+        raise ImportError("clean_data_pipeline_polars requiere polars (pip install polars)")
+    
+    logger.info("Iniciando pipeline de limpieza (Polars)")
+    
+    cleaning_log = CleaningLog()
+    cleaning_log.set_before_stats(df)
+    
+    # Identificador de fila para recuperar el índice original al final
+    row_id = '__fila__'
+    text_columns = df.select_dtypes(include=['object', 'string']).columns.tolist()
+    lf = pl.from_pandas(df).lazy().with_row_index(row_id)
+    
+    # 1. Filtrar dominios y 2. normalizar columnas de texto, en el mismo
+    # orden que clean_data_pipeline: las columnas de texto se comparan ya
+    # normalizadas y los cambios se cuentan solo en las filas que quedan
+    normalized = []
+    modified_flags = []
+    for i, col in enumerate(text_columns):
+        expr = (
+            pl.col(col)
+            .str.strip_chars()
+            .str.replace_all(_WS_PATTERN, ' ')
+            .str.to_titlecase()
+        )
+        expr = pl.when(expr == 'Nan').then(None).otherwise(expr)
+        normalized.append(expr.alias(col))
+        modified_flags.append((pl.col(col).is_not_null() & expr.ne_missing(pl.col(col))).alias(f'__mod_{i}__'))
+    flag_cols = [f'__mod_{i}__' for i in range(len(text_columns))]
+    lf_norm = lf.with_columns(normalized + modified_flags)
+    
+    # Un solo predicado para todos los dominios
+    domain_filter = pl.lit(True)
+    for domain_col, allowed_vals in config['domains'].items():
+        if domain_col in df.columns:
+            domain_filter = domain_filter & (pl.col(domain_col).is_in(allowed_vals) | pl.col(domain_col).is_null())
+    lf_domain = lf_norm.filter(domain_filter)
+    
+    # 3. Eliminar duplicados
+    lf_dedup = lf_domain.drop(flag_cols).unique(
+        subset=key_columns or list(df.columns), keep='first', maintain_order=True
+    )
+    
+    # 4. Eliminar nulos
+    lf_final = lf_dedup.drop_nulls(subset=list(df.columns))
+    
+    # Ejecutar el plan y los conteos de cada paso en una sola pasada
+    logger.info("Ejecutando plan de limpieza")
+    result, n_modified, n_after_domain, n_after_dedup = pl.collect_all([
+        lf_final,
+        lf_domain.select(pl.sum_horizontal([pl.col(c).sum() for c in flag_cols]) if flag_cols else pl.lit(0)),
+        lf_domain.select(pl.len()),
+        lf_dedup.select(pl.len())
+    ])
+    n_after_domain = n_after_domain.item()
+    n_after_dedup = n_after_dedup.item()
+    
+    cleaning_log.log_operation('Filtrado por dominios', {
+        'registros_removidos': len(df) - n_after_domain
+    })
+    cleaning_log.log_operation('Normalización de texto', {
+        'columnas_procesadas': len(text_columns),
+        'valores_modificados': int(n_modified.item())
+    })
+    cleaning_log.log_operation('Eliminación de duplicados', {
+        'registros_removidos': n_after_domain - n_after_dedup,
+        'columnas_clave': key_columns if key_columns else 'todas'
+    })
+    cleaning_log.log_operation('Eliminación de nulos', {
+        'registros_removidos': n_after_dedup - len(result)
+    })
+    
+    # Volver a pandas conservando índice y tipos de texto
+    df_clean = result.drop(row_id).to_pandas()
+    df_clean.index = df.index[result.get_column(row_id).to_numpy()]
+    df_clean = df_clean.astype({col: TEXT_DTYPE for col in text_columns})
+    
+    # Tras deduplicar y eliminar nulos ambos conteos son 0 por construcción
+    cleaning_log.set_after_stats(df_clean, n_dups=0, n_nulls=0)
     
     logger.info(f"Pipeline de limpieza finalizado: {len(df)} -> {len(df_clean)} registros")
     
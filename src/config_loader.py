@@ -3,6 +3,8 @@ Cargador y validador de configuración central.
 Lectura de config.yaml con validación de estructura.
 """
 
+import copy
+import functools
 import yaml
 from pathlib import Path
 from typing import Dict, Any, List
@@ -10,6 +12,17 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Parser en C (libyaml) cuando está disponible
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+# Claves obligatorias de config.yaml
+_REQUIRED_SECTIONS = frozenset({'paths', 'columns_expected', 'domains', 'time', 'random_seed', 'outputs', 'plots'})
+_REQUIRED_PATHS = frozenset({'data_raw', 'data_processed', 'figures', 'reports', 'notebooks'})
+_REQUIRED_DOMAINS = frozenset({'MODALIDAD', 'COMPLEJIDAD'})
+
 
 def get_project_root() -> Path:
     """
@@ -47,13 +60,22 @@ def load_config(config_path: str = None) -> Dict[str, Any]:
     
     logger.info(f"Cargando configuración desde: {config_path}")
     
+    # Copia para que modificar el resultado no altere la versión en caché
+    config = copy.deepcopy(_load_config_cached(str(config_path), config_path.stat().st_mtime))
+    
+    logger.info("Configuración cargada y validada correctamente")
+    return config
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config_cached(config_path: str, mtime: float) -> Dict[str, Any]:
+    """Parsea y valida config.yaml; la caché se invalida si cambia su mtime."""
     with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=_Loader)
     
     # Validar estructura básica
     _validate_config_structure(config)
     
-    logger.info("Configuración cargada y validada correctamente")
     return config
 
 
@@ -65,24 +87,20 @@ def _validate_config_structure(config: Dict[str, Any]) -> None:
         config: Diccionario de configuración.
         
     Raises:
-        ValueError: Si falta alguna sección obligatoria.
+        ValueError: Si faltan secciones obligatorias (se reportan todas juntas).
     """
-    required_sections = ['paths', 'columns_expected', 'domains', 'time', 'random_seed', 'outputs', 'plots']
-    
-    for section in required_sections:
-        if section not in config:
-            raise ValueError(f"Sección obligatoria '{section}' no encontrada en config.yaml")
+    missing = _REQUIRED_SECTIONS - config.keys()
+    if missing:
+        raise ValueError(f"Secciones obligatorias no encontradas en config.yaml: {sorted(missing)}")
     
     # Validar subsecciones críticas
-    required_paths = ['data_raw', 'data_processed', 'figures', 'reports', 'notebooks']
-    for path_key in required_paths:
-        if path_key not in config['paths']:
-            raise ValueError(f"Ruta '{path_key}' no definida en paths")
-
-    required_domains = ['MODALIDAD', 'COMPLEJIDAD']
-    for domain in required_domains:
-        if domain not in config['domains']:
-            raise ValueError(f"Dominio '{domain}' no definido en domains")
+    missing = _REQUIRED_PATHS - config['paths'].keys()
+    if missing:
+        raise ValueError(f"Rutas no definidas en paths: {sorted(missing)}")
+    
+    missing = _REQUIRED_DOMAINS - config['domains'].keys()
+    if missing:
+        raise ValueError(f"Dominios no definidos en domains: {sorted(missing)}")
     
     logger.debug("Estructura de configuración validada")
 
@@ -6,20 +6,77 @@ Funciones para métricas del Hito 1: sin comunidades ni centralidades costosas.
 import pandas as pd
 import numpy as np
 import networkx as nx
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+import scipy.sparse
+from scipy.sparse.csgraph import connected_components
 from pathlib import Path
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, Optional
 import logging
 
+# Backend opcional en C para el clustering global
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
+
 logger = logging.getLogger(__name__)
 
 
-def compute_basic_metrics(G: nx.Graph) -> Dict[str, Any]:
+def degree_array(G: nx.Graph, weight: Optional[str] = None) -> np.ndarray:
+    """
+    Materializa los grados de un grafo como arreglo NumPy (una sola pasada).
+    
+    Args:
+        G: Grafo de NetworkX.
+        weight: Atributo de peso. Si se indica, devuelve la fuerza (strength).
+        
+    Returns:
+        Arreglo con el grado (int64) o la fuerza (float64) de cada nodo.
+    """
+    dtype = np.int64 if weight is None else np.float64
+    return np.fromiter((d for _, d in G.degree(weight=weight)), dtype=dtype, count=G.number_of_nodes())
+
+
+def adjacency_csr(G: nx.Graph) -> scipy.sparse.csr_array:
+    """
+    Construye la matriz de adyacencia dispersa (CSR) del grafo, sin pesos.
+    
+    Args:
+        G: Grafo de NetworkX.
+        
+    Returns:
+        Matriz CSR con las filas en el orden de G.nodes().
+    """
+    return nx.to_scipy_sparse_array(G, weight=None, format='csr')
+
+
+def _to_igraph(G: nx.Graph) -> "ig.Graph":
+    """
+    Convierte un grafo de NetworkX a igraph (no dirigido, sin atributos).
+    
+    Args:
+        G: Grafo de NetworkX.
+        
+    Returns:
+        Grafo de igraph con los vértices en el orden de G.nodes().
+    """
+    index = {node: i for i, node in enumerate(G.nodes())}
+    edges = [(index[u], index[v]) for u, v in G.edges()]
+    return ig.Graph(n=G.number_of_nodes(), edges=edges)
+
+
+def compute_basic_metrics(
+    G: nx.Graph,
+    degrees: Optional[np.ndarray] = None,
+    adjacency: Optional[scipy.sparse.csr_array] = None
+) -> Dict[str, Any]:
     """
     Calcula métricas básicas de red (Hito 1).
     
     Args:
         G: Grafo de NetworkX.
+        degrees: Grados precalculados con degree_array (opcional).
+        adjacency: Matriz precalculada con adjacency_csr (opcional).
         
     Returns:
         Diccionario con métricas.
@@ -39,32 +96,31 @@ def compute_basic_metrics(G: nx.Graph) -> Dict[str, Any]:
         metrics['density'] = 0.0
     
     # Grado medio
-    degrees = dict(G.degree())
-    if degrees:
-        metrics['avg_degree'] = np.mean(list(degrees.values()))
-        metrics['max_degree'] = np.max(list(degrees.values()))
-        metrics['min_degree'] = np.min(list(degrees.values()))
+    if degrees is None:
+        degrees = degree_array(G)
+    if degrees.size:
+        metrics['avg_degree'] = float(degrees.mean())
+        metrics['max_degree'] = int(degrees.max())
+        metrics['min_degree'] = int(degrees.min())
     else:
         metrics['avg_degree'] = 0.0
         metrics['max_degree'] = 0
         metrics['min_degree'] = 0
     
     # Nodos aislados
-    metrics['isolated_nodes'] = nx.number_of_isolates(G)
+    metrics['isolated_nodes'] = int(np.count_nonzero(degrees == 0))
     metrics['pct_isolated'] = (metrics['isolated_nodes'] / metrics['n_nodes'] * 100) if metrics['n_nodes'] > 0 else 0
     
     # Componentes conectados
     if G.number_of_nodes() > 0:
-        components = list(nx.connected_components(G))
-        metrics['n_components'] = len(components)
+        if adjacency is None:
+            adjacency = adjacency_csr(G)
+        n_components, labels = connected_components(adjacency, directed=False, return_labels=True)
+        metrics['n_components'] = int(n_components)
         
-        if components:
-            lcc_size = len(max(components, key=len))
-            metrics['lcc_size'] = lcc_size
-            metrics['lcc_pct'] = (lcc_size / metrics['n_nodes'] * 100)
-        else:
-            metrics['lcc_size'] = 0
-            metrics['lcc_pct'] = 0.0
+        lcc_size = int(np.bincount(labels).max())
+        metrics['lcc_size'] = lcc_size
+        metrics['lcc_pct'] = (lcc_size / metrics['n_nodes'] * 100)
     else:
         metrics['n_components'] = 0
         metrics['lcc_size'] = 0
@@ -72,7 +128,10 @@ def compute_basic_metrics(G: nx.Graph) -> Dict[str, Any]:
     
     # Clustering global (solo si hay suficientes nodos)
     try:
-        if metrics['n_nodes'] > 2:
+        if metrics['n_nodes'] > 2 and ig is not None:
+            g_ig = _to_igraph(G).simplify()
+            metrics['clustering_global'] = g_ig.transitivity_undirected(mode='zero')
+        elif metrics['n_nodes'] > 2:
             metrics['clustering_global'] = nx.transitivity(G)
         else:
             metrics['clustering_global'] = 0.0
@@ -84,12 +143,13 @@ def compute_basic_metrics(G: nx.Graph) -> Dict[str, Any]:
     return metrics
 
 
-def compute_weighted_metrics(G: nx.Graph) -> Dict[str, Any]:
+def compute_weighted_metrics(G: nx.Graph, strengths: Optional[np.ndarray] = None) -> Dict[str, Any]:
     """
     Calcula métricas para grafos ponderados.
     
     Args:
         G: Grafo ponderado.
+        strengths: Fuerzas precalculadas con degree_array(G, 'weight') (opcional).
         
     Returns:
         Diccionario con métricas.
@@ -99,13 +159,14 @@ def compute_weighted_metrics(G: nx.Graph) -> Dict[str, Any]:
     metrics = {}
     
     # Fuerza (strength): suma de pesos de aristas incidentes
-    strength = dict(G.degree(weight='weight'))
-    
-    if strength:
-        metrics['avg_strength'] = np.mean(list(strength.values()))
-        metrics['max_strength'] = np.max(list(strength.values()))
-        metrics['min_strength'] = np.min(list(strength.values()))
-        metrics['std_strength'] = np.std(list(strength.values()))
+    if strengths is None:
+        strengths = degree_array(G, weight='weight')
+    
+    if strengths.size:
+        metrics['avg_strength'] = float(strengths.mean())
+        metrics['max_strength'] = float(strengths.max())
+        metrics['min_strength'] = float(strengths.min())
+        metrics['std_strength'] = float(strengths.std())
     else:
         metrics['avg_strength'] = 0.0
         metrics['max_strength'] = 0.0
@@ -113,20 +174,48 @@ def compute_weighted_metrics(G: nx.Graph) -> Dict[str, Any]:
         metrics['std_strength'] = 0.0
     
     # Peso total de la red
-    weights = [d.get('weight', 1) for _, _, d in G.edges(data=True)]
-    metrics['total_weight'] = sum(weights)
-    metrics['avg_edge_weight'] = np.mean(weights) if weights else 0.0
+    weights = np.fromiter(
+        (d.get('weight', 1) for _, _, d in G.edges(data=True)),
+        dtype=np.float64,
+        count=G.number_of_edges()
+    )
+    metrics['total_weight'] = float(weights.sum())
+    metrics['avg_edge_weight'] = float(weights.mean()) if weights.size else 0.0
     
     logger.info(f"  Fuerza media={metrics['avg_strength']:.2f}, peso total={metrics['total_weight']}")
     
     return metrics
 
 
+def _prepare_axes(fig: Optional[Figure], figsize: Tuple[float, float]):
+    """Limpia (o crea) una figura fuera de pyplot y devuelve un único eje."""
+    if fig is None:
+        fig = Figure(figsize=figsize)
+    else:
+        fig.clf()
+        fig.set_size_inches(figsize)
+    return fig.add_subplot()
+
+
+def _draw_histogram(ax, values: np.ndarray, bins: int = 30, **bar_kwargs) -> None:
+    """Dibuja un histograma ya binado con np.histogram (sin recopiar en matplotlib)."""
+    counts, edges = np.histogram(values, bins=bins)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', **bar_kwargs)
+
+
+def _save_figure(fig: Figure, output_path: Path, config: Dict[str, Any]) -> None:
+    """Ajusta y guarda la figura con el formato de la configuración."""
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=config['plots']['dpi'], format=config['plots']['format'])
+
+
 def plot_degree_distribution(
     G: nx.Graph,
     output_path: Path,
     config: Dict[str, Any],
-    title: str = "Distribución de Grado"
+    title: str = "Distribución de Grado",
+    degrees: Optional[np.ndarray] = None,
+    fig: Optional[Figure] = None
 ) -> None:
     """
     Genera histograma de distribución de grado.
@@ -136,20 +225,21 @@ def plot_degree_distribution(
         output_path: Ruta para guardar la figura.
         config: Configuración.
         title: Título del gráfico.
+        degrees: Grados precalculados con degree_array (opcional).
+        fig: Figura a reutilizar (se limpia antes de dibujar, opcional).
     """
     logger.info(f"Generando gráfico: {title}")
     
-    degrees = [d for n, d in G.degree()]
+    if degrees is None:
+        degrees = degree_array(G)
     
-    plt.figure(figsize=config['plots']['figsize_hist'])
-    plt.hist(degrees, bins=30, edgecolor='black', alpha=0.7)
-    plt.xlabel('Grado')
-    plt.ylabel('Frecuencia')
-    plt.title(title)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=config['plots']['dpi'], format=config['plots']['format'])
-    plt.close()
+    ax = _prepare_axes(fig, config['plots']['figsize_hist'])
+    _draw_histogram(ax, degrees, edgecolor='black', alpha=0.7)
+    ax.set_xlabel('Grado')
+    ax.set_ylabel('Frecuencia')
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    _save_figure(ax.figure, output_path, config)
     
     logger.info(f"  Guardado: {output_path}")
 
@@ -158,7 +248,9 @@ def plot_strength_distribution(
     G: nx.Graph,
     output_path: Path,
     config: Dict[str, Any],
-    title: str = "Distribución de Fuerza (Strength)"
+    title: str = "Distribución de Fuerza (Strength)",
+    strengths: Optional[np.ndarray] = None,
+    fig: Optional[Figure] = None
 ) -> None:
     """
     Genera histograma de distribución de fuerza para grafos ponderados.
@@ -168,20 +260,21 @@ def plot_strength_distribution(
         output_path: Ruta para guardar la figura.
         config: Configuración.
         title: Título del gráfico.
+        strengths: Fuerzas precalculadas con degree_array(G, 'weight') (opcional).
+        fig: Figura a reutilizar (se limpia antes de dibujar, opcional).
     """
     logger.info(f"Generando gráfico: {title}")
     
-    strengths = [d for n, d in G.degree(weight='weight')]
+    if strengths is None:
+        strengths = degree_array(G, weight='weight')
     
-    plt.figure(figsize=config['plots']['figsize_hist'])
-    plt.hist(strengths, bins=30, edgecolor='black', alpha=0.7, color='orange')
-    plt.xlabel('Fuerza (Strength)')
-    plt.ylabel('Frecuencia')
-    plt.title(title)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=config['plots']['dpi'], format=config['plots']['format'])
-    plt.close()
+    ax = _prepare_axes(fig, config['plots']['figsize_hist'])
+    _draw_histogram(ax, strengths, edgecolor='black', alpha=0.7, color='orange')
+    ax.set_xlabel('Fuerza (Strength)')
+    ax.set_ylabel('Frecuencia')
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    _save_figure(ax.figure, output_path, config)
     
     logger.info(f"  Guardado: {output_path}")
 
@@ -192,7 +285,8 @@ def plot_categorical_by_year(
     output_path: Path,
     config: Dict[str, Any],
     year_col: str = 'AÑO',
-    title: str = None
+    title: str = None,
+    fig: Optional[Figure] = None
 ) -> None:
     """
     Genera gráfico de barras de una variable categórica por año.
@@ -204,6 +298,7 @@ def plot_categorical_by_year(
         config: Configuración.
         year_col: Nombre de columna de año.
         title: Título del gráfico.
+        fig: Figura a reutilizar (se limpia antes de dibujar, opcional).
     """
     if title is None:
         title = f"{column} por {year_col}"
@@ -213,17 +308,15 @@ def plot_categorical_by_year(
     # Crear tabla de contingencia
     ct = pd.crosstab(df[year_col], df[column])
     
-    plt.figure(figsize=config['plots']['figsize_bar'])
-    ct.plot(kind='bar', ax=plt.gca(), edgecolor='black', alpha=0.8)
-    plt.xlabel(year_col)
-    plt.ylabel('Frecuencia')
-    plt.title(title)
-    plt.legend(title=column, bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.xticks(rotation=45)
-    plt.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=config['plots']['dpi'], format=config['plots']['format'])
-    plt.close()
+    ax = _prepare_axes(fig, config['plots']['figsize_bar'])
+    ct.plot(kind='bar', ax=ax, edgecolor='black', alpha=0.8)
+    ax.set_xlabel(year_col)
+    ax.set_ylabel('Frecuencia')
+    ax.set_title(title)
+    ax.legend(title=column, bbox_to_anchor=(1.05, 1), loc='upper left')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True, alpha=0.3, axis='y')
+    _save_figure(ax.figure, output_path, config)
     
     logger.info(f"  Guardado: {output_path}")
 
@@ -232,7 +325,9 @@ def generate_all_plots(
     df_clean: pd.DataFrame,
     G_proyeccion: nx.Graph,
     figures_path: Path,
-    config: Dict[str, Any]
+    config: Dict[str, Any],
+    degrees: Optional[np.ndarray] = None,
+    strengths: Optional[np.ndarray] = None
 ) -> None:
     """
     Genera todos los gráficos del EDA básico.
@@ -242,18 +337,25 @@ def generate_all_plots(
         G_proyeccion: Grafo de proyección cliente-cliente.
         figures_path: Ruta al directorio de figuras.
         config: Configuración.
+        degrees: Grados de G_proyeccion ya calculados con degree_array (opcional).
+        strengths: Fuerzas de G_proyeccion ya calculadas con degree_array (opcional).
     """
     logger.info("Generando todas las figuras")
     
     figures_path = Path(figures_path)
     figures_path.mkdir(parents=True, exist_ok=True)
     
+    # Una sola figura (sin pyplot ni backend interactivo) reutilizada en todos los gráficos
+    fig = Figure(figsize=config['plots']['figsize_hist'])
+    
     # 1. Histograma de grado
     plot_degree_distribution(
         G_proyeccion,
         figures_path / 'hist_grado.png',
         config,
-        title='Distribución de Grado - Red Cliente-Cliente'
+        title='Distribución de Grado - Red Cliente-Cliente',
+        degrees=degrees,
+        fig=fig
     )
     
     # 2. Histograma de fuerza
@@ -261,7 +363,9 @@ def generate_all_plots(
         G_proyeccion,
         figures_path / 'hist_fuerza.png',
         config,
-        title='Distribución de Fuerza - Red Cliente-Cliente'
+        title='Distribución de Fuerza - Red Cliente-Cliente',
+        strengths=strengths,
+        fig=fig
     )
     
     # 3. Modalidad por año
@@ -272,7 +376,8 @@ def generate_all_plots(
             figures_path / 'barras_modalidad_por_anio.png',
             config,
             year_col='AÑO',
-            title='Modalidad de Servicio por Año'
+            title='Modalidad de Servicio por Año',
+            fig=fig
         )
     
     # 4. Complejidad por año
@@ -283,7 +388,8 @@ def generate_all_plots(
             figures_path / 'barras_complejidad_por_anio.png',
             config,
             year_col='AÑO',
-            title='Complejidad por Año'
+            title='Complejidad por Año',
+            fig=fig
         )
     
     logger.info("Todas las figuras generadas exitosamente")
@@ -3,14 +3,30 @@ Utilidades de entrada/salida para el proyecto.
 Lectura y escritura segura de datos, detección automática de archivos.
 """
 
+import os
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Identificadores de alta cardinalidad respaldados por Arrow si está disponible,
+# y escritor CSV multihilo de Arrow opcional para write_data_file
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    ID_DTYPE = 'string[pyarrow]'
+except ImportError:
+    pa = None
+    ID_DTYPE = 'string'
+
+
+def _as_path(path: Union[str, os.PathLike]) -> Path:
+    """Devuelve path como Path, sin volver a construirlo si ya lo es."""
+    return path if isinstance(path, Path) else Path(path)
+
 
 def find_data_file(
     data_dir: Path,
@@ -33,18 +49,25 @@ def find_data_file(
         FileNotFoundError: Si no se encuentra ningún archivo.
         ValueError: Si hay múltiples archivos sin patrón específico.
     """
-    data_dir = Path(data_dir)
+    data_dir = _as_path(data_dir)
     
     if not data_dir.exists():
         raise FileNotFoundError(f"Directorio no encontrado: {data_dir}")
     
-    # Buscar archivos con las extensiones permitidas
-    files = []
-    for ext in extensions:
-        if pattern:
-            files.extend(data_dir.glob(f"*{pattern}*{ext}"))
-        else:
-            files.extend(data_dir.glob(f"*{ext}"))
+    # Buscar archivos con las extensiones permitidas en una sola pasada de
+    # scandir (el tipo de entrada viene del propio listado, sin stat extra)
+    matches = []
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            for rank, ext in enumerate(extensions):
+                if name.endswith(ext) and (not pattern or pattern in name[:-len(ext)]):
+                    if entry.is_file():
+                        matches.append((rank, Path(entry.path)))
+                    break
+    
+    # Mismo orden de prioridad que antes: primero por extensión
+    files = [path for _, path in sorted(matches, key=lambda m: m[0])]
     
     if len(files) == 0:
         raise FileNotFoundError(f"No se encontraron archivos en {data_dir} con extensiones {extensions}")
@@ -58,10 +81,35 @@ def find_data_file(
     return files[0]
 
 
+def build_dtype_from_config(
+    config: Dict[str, Any],
+    person_col: str = 'PERSONA'
+) -> Dict[str, Any]:
+    """
+    Construye el diccionario dtype para read_data_file a partir de config['domains'].
+    
+    Las columnas con dominio se leen como categóricas con las categorías
+    permitidas (códigos enteros en lugar de objetos string). Los valores
+    fuera del dominio se leen como nulos, por lo que solo debe usarse con
+    datos ya limpios y normalizados.
+    
+    Args:
+        config: Diccionario de configuración.
+        person_col: Columna identificadora de personas (alta cardinalidad).
+        
+    Returns:
+        Diccionario {columna: dtype}.
+    """
+    dtype = {col: pd.CategoricalDtype(vals) for col, vals in config['domains'].items()}
+    dtype[person_col] = ID_DTYPE
+    return dtype
+
+
 def read_data_file(
     file_path: Path,
     expected_columns: Optional[List[str]] = None,
-    dtype: Optional[Dict[str, Any]] = None
+    dtype: Optional[Dict[str, Any]] = None,
+    engine: Optional[str] = None
 ) -> pd.DataFrame:
     """
     Lee un archivo de datos (CSV o Excel) con validación básica.
@@ -70,6 +118,10 @@ def read_data_file(
         file_path: Ruta al archivo.
         expected_columns: Columnas esperadas (opcional, para validación).
         dtype: Diccionario de tipos de datos por columna.
+        engine: Motor CSV. Por defecto el de pandas; 'pyarrow' (multihilo)
+            es opcional porque infiere tipos antes de aplicar dtype (ej.
+            '007' pasa a '7') y convierte fechas ISO a date, así que se
+            ignora si se pasa dtype.
         
     Returns:
         DataFrame con los datos.
@@ -77,18 +129,33 @@ def read_data_file(
     Raises:
         ValueError: Si faltan columnas esperadas.
     """
-    file_path = Path(file_path)
+    file_path = _as_path(file_path)
     
     if not file_path.exists():
         raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
     
     logger.info(f"Leyendo archivo: {file_path.name}")
     
-    # Leer según extensión
+    # Leer según extensión; calamine para Excel si está instalado y Arrow
+    # para CSV solo a pedido, con el motor por defecto como respaldo
     if file_path.suffix == '.csv':
-        df = pd.read_csv(file_path, dtype=dtype)
+        if engine == 'pyarrow' and dtype is not None:
+            logger.debug("Motor pyarrow ignorado con dtype explícito, usando motor por defecto")
+            engine = None
+        if engine == 'pyarrow':
+            try:
+                df = pd.read_csv(file_path, engine='pyarrow')
+            except (ImportError, ValueError) as e:
+                logger.debug(f"Motor pyarrow no disponible ({e}), usando motor por defecto")
+                df = pd.read_csv(file_path)
+        else:
+            df = pd.read_csv(file_path, dtype=dtype, engine=engine)
     elif file_path.suffix in ['.xlsx', '.xls']:
-        df = pd.read_excel(file_path, dtype=dtype)
+        try:
+            df = pd.read_excel(file_path, dtype=dtype, engine='calamine')
+        except (ImportError, ValueError) as e:
+            logger.debug(f"Motor calamine no disponible ({e}), usando motor por defecto")
+            df = pd.read_excel(file_path, dtype=dtype)
     else:
         raise ValueError(f"Extensión no soportada: {file_path.suffix}")
     
@@ -104,11 +171,46 @@ def read_data_file(
     return df
 
 
+def read_data_file_chunked(
+    file_path: Path,
+    chunksize: int = 500_000,
+    dtype: Optional[Dict[str, Any]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Lee un CSV por bloques para acotar la memoria al tamaño de cada bloque.
+    
+    Args:
+        file_path: Ruta al archivo CSV.
+        chunksize: Filas por bloque.
+        dtype: Diccionario de tipos de datos por columna.
+        
+    Yields:
+        DataFrames de hasta chunksize filas.
+        
+    Raises:
+        FileNotFoundError: Si no se encuentra el archivo.
+        ValueError: Si el archivo no es CSV.
+    """
+    file_path = _as_path(file_path)
+    
+    if not file_path.exists():
+        raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+    if file_path.suffix != '.csv':
+        raise ValueError(f"Lectura por bloques solo soportada para CSV: {file_path.suffix}")
+    
+    logger.info(f"Leyendo archivo por bloques de {chunksize} filas: {file_path.name}")
+    
+    # El motor pyarrow no soporta chunksize; se usa el motor C
+    with pd.read_csv(file_path, dtype=dtype, chunksize=chunksize, engine='c') as reader:
+        yield from reader
+
+
 def write_data_file(
     df: pd.DataFrame,
     file_path: Path,
     index: bool = False,
-    create_dirs: bool = True
+    create_dirs: bool = True,
+    engine: Optional[str] = None
 ) -> None:
     """
     Escribe un DataFrame a archivo CSV de forma segura.
@@ -118,19 +220,50 @@ def write_data_file(
         file_path: Ruta de destino.
         index: Si True, incluye el índice en el CSV.
         create_dirs: Si True, crea directorios si no existen.
+        engine: Por defecto pandas. Con 'pyarrow' se usa el escritor CSV
+            multihilo de Arrow si la tabla solo tiene columnas enteras o de
+            texto; los valores son los mismos, pero Arrow entrecomilla el
+            encabezado y todas las celdas de texto.
     """
-    file_path = Path(file_path)
+    file_path = _as_path(file_path)
     
     if create_dirs:
         file_path.parent.mkdir(parents=True, exist_ok=True)
     
     logger.info(f"Escribiendo archivo: {file_path.name} ({df.shape[0]} filas, {df.shape[1]} columnas)")
     
-    df.to_csv(file_path, index=index, encoding='utf-8')
+    if engine == 'pyarrow' and pa is not None and not index and _arrow_csv_compatible(df):
+        _write_csv_arrow(df, file_path)
+    else:
+        df.to_csv(file_path, index=index, encoding='utf-8')
     
     logger.info(f"Archivo guardado exitosamente: {file_path}")
 
 
+def _arrow_csv_compatible(df: pd.DataFrame) -> bool:
+    """
+    True si Arrow escribe los mismos valores que pandas (solo enteros y texto).
+    
+    Con bool, float o fechas Arrow cambia el formato (true/false, 1 en vez
+    de 1.0, hora añadida); esas tablas se escriben con pandas.
+    """
+    return all(
+        (pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype))
+        or pd.api.types.is_string_dtype(dtype)
+        for dtype in df.dtypes
+    )
+
+
+def _write_csv_arrow(df: pd.DataFrame, file_path: Path) -> None:
+    """Escribe CSV (UTF-8, sin índice) con el escritor de Arrow; respaldo a pandas."""
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pacsv.write_csv(table, str(file_path), write_options=pacsv.WriteOptions(quoting_style='needed'))
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        logger.debug(f"Escritor Arrow no aplicable ({e}), usando pandas")
+        df.to_csv(file_path, index=False, encoding='utf-8')
+
+
 def get_data_snapshot_path(original_path: Path, suffix: str = "_snapshot") -> Path:
     """
     Genera la ruta para un archivo snapshot.
@@ -143,32 +276,63 @@ def get_data_snapshot_path(original_path: Path, suffix: str = "_snapshot") -> Pa
     Returns:
         Path con el sufijo añadido y extensión .csv
     """
-    stem = original_path.stem
-    parent = original_path.parent
+    original_path = _as_path(original_path)
     
     # Siempre usar .csv para snapshots (write_data_file guarda como CSV)
-    return parent / f"{stem}{suffix}.csv"
+    return original_path.with_name(f"{original_path.stem}{suffix}.csv")
+
 
+def _is_arrow_backed(dtype: Any) -> bool:
+    """True si el dtype está respaldado por buffers Arrow (tamaño conocido sin recorrerlos)."""
+    return isinstance(dtype, pd.ArrowDtype) or (
+        isinstance(dtype, pd.StringDtype) and dtype.storage.startswith('pyarrow')
+    )
 
-def profile_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+
+def profile_dataframe(
+    df: pd.DataFrame,
+    n_sample: int = 1_000_000,
+    key_columns: Optional[List[str]] = None
+) -> Dict[str, Any]:
     """
     Genera un perfil básico de un DataFrame.
     
     Args:
         df: DataFrame a perfilar.
+        n_sample: Máximo de filas usadas para estimar la memoria (deep=True);
+            por encima se extrapola linealmente desde una muestra.
+        key_columns: Columnas clave para contar duplicados. Si None, usa todas.
         
     Returns:
-        Diccionario con información de perfil.
+        Diccionario con información de perfil; dtypes y nulos por columna
+        se devuelven como Series indexadas por columna.
     """
+    # Conteo de nulos por columna una sola vez (se reutiliza para porcentajes)
+    missing = df.isna().sum()
+    
+    # Memoria: las columnas Arrow reportan el tamaño de sus buffers en O(1);
+    # solo las columnas object necesitan deep=True, que recorre cada string,
+    # así que en frames grandes se miden sobre una muestra y se extrapola
+    is_arrow = df.dtypes.map(_is_arrow_backed).to_numpy(dtype=bool)
+    arrow_cols = df.columns[is_arrow]
+    other_cols = df.columns[~is_arrow]
+    memory_bytes = df[arrow_cols].memory_usage(deep=False, index=False).sum()
+    memory_bytes += df.index.memory_usage(deep=False)
+    if len(df) > n_sample:
+        sample = df[other_cols].sample(n=n_sample, random_state=0)
+        memory_bytes += sample.memory_usage(deep=True, index=False).sum() * len(df) / n_sample
+    else:
+        memory_bytes += df[other_cols].memory_usage(deep=True, index=False).sum()
+    
     profile = {
         'n_rows': len(df),
         'n_cols': len(df.columns),
         'columns': list(df.columns),
-        'dtypes': df.dtypes.to_dict(),
-        'missing_counts': df.isnull().sum().to_dict(),
-        'missing_pcts': (df.isnull().sum() / len(df) * 100).to_dict(),
-        'duplicated_rows': df.duplicated().sum(),
-        'memory_usage_mb': df.memory_usage(deep=True).sum() / 1024**2
+        'dtypes': df.dtypes,
+        'missing_counts': missing,
+        'missing_pcts': missing / len(df) * 100,
+        'duplicated_rows': df.duplicated(subset=key_columns).sum(),
+        'memory_usage_mb': memory_bytes / 1024**2
     }
     
     return profile
@@ -182,6 +346,8 @@ def print_profile(profile: Dict[str, Any], logger: logging.Logger = None) -> Non
         profile: Diccionario de perfil generado por profile_dataframe.
         logger: Logger opcional. Si es None, usa print.
     """
+    if logger is not None and not logger.isEnabledFor(logging.INFO):
+        return
     log_func = logger.info if logger else print
     
     log_func(f"  Filas: {profile['n_rows']:,}")
@@ -189,7 +355,7 @@ def print_profile(profile: Dict[str, Any], logger: logging.Logger = None) -> Non
     log_func(f"  Filas duplicadas: {profile['duplicated_rows']}")
     log_func(f"  Memoria: {profile['memory_usage_mb']:.2f} MB")
     log_func(f"\n  Columnas y tipos:")
-    for col, dtype in profile['dtypes'].items():
-        missing = profile['missing_counts'][col]
-        missing_pct = profile['missing_pcts'][col]
+    for col, dtype, missing, missing_pct in zip(
+        profile['dtypes'].index, profile['dtypes'], profile['missing_counts'], profile['missing_pcts']
+    ):
         log_func(f"    - {col}: {dtype} (nulos: {missing}, {missing_pct:.1f}%)")
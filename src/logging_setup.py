@@ -4,11 +4,18 @@ Logger estándar con formato timestamp, nivel y módulo.
 """
 
 import logging
+import os
 import sys
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
 
+# Formato estándar: timestamp | nivel | módulo | mensaje
+_FORMATTER = logging.Formatter(
+    fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
 
 def setup_logger(
     name: str = "etl_pipeline",
@@ -32,30 +39,39 @@ def setup_logger(
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
-    # Evitar duplicación de handlers
-    if logger.handlers:
-        logger.handlers.clear()
-    
-    # Formato estándar: timestamp | nivel | módulo | mensaje
-    formatter = logging.Formatter(
-        fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    # Reutilizar handlers equivalentes ya instalados (llamadas repetidas desde
+    # notebooks) y descartar el resto, evitando duplicados
+    log_path = os.path.abspath(log_file) if log_file is not None else None
+    file_handler = None
+    console_handler = None
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            if file_handler is None and handler.baseFilename == log_path:
+                file_handler = handler
+                continue
+        elif isinstance(handler, logging.StreamHandler):
+            if console and console_handler is None and handler.stream is sys.stdout:
+                console_handler = handler
+                continue
+        logger.removeHandler(handler)
+        handler.close()
     
     # Handler para archivo
     if log_file is not None:
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        if file_handler is None:
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler.setFormatter(_FORMATTER)
+            logger.addHandler(file_handler)
         file_handler.setLevel(level)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
     
     # Handler para consola
     if console:
-        console_handler = logging.StreamHandler(sys.stdout)
+        if console_handler is None:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(_FORMATTER)
+            logger.addHandler(console_handler)
         console_handler.setLevel(level)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
     
     return logger
 
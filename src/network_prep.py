@@ -4,16 +4,120 @@ Construcción de redes bipartitas y proyecciones cliente-cliente.
 """
 
 import pandas as pd
+import numpy as np
 import networkx as nx
+import scipy.sparse
 from pathlib import Path
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List, Iterable, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Kernel paralelo opcional (numba) para los pesos de la proyección
+try:
+    from numba import njit, prange, get_num_threads
+except ImportError:
+    njit = None
+
+
+def _unique_rows(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
+    """Filas únicas de df[cols] en orden de primera aparición (como drop_duplicates)."""
+    # Cada columna se factoriza a códigos enteros y la terna se empaqueta en
+    # una clave int64 (base mixta), evitando hashear objetos fila a fila.
+    # Los nulos (código -1) pasan a ser el código 0.
+    codes = []
+    sizes = []
+    for col in cols:
+        col_codes, uniques = pd.factorize(df[col], sort=False)
+        codes.append(col_codes.astype(np.int64) + 1)
+        sizes.append(len(uniques) + 1)
+    
+    if np.prod(sizes, dtype=float) >= 2**63:
+        return df[cols].drop_duplicates()
+    
+    key = codes[0]
+    for col_codes, size in zip(codes[1:], sizes[1:]):
+        key = key * size + col_codes
+    _, first_idx = np.unique(key, return_index=True)
+    return df.iloc[np.sort(first_idx)][cols].copy()
+
+
+# Bits por columna de la clave empaquetada en modo por bloques
+# (persona, servicio, año): 32 + 20 + 11 = 63 bits
+_CHUNK_KEY_BITS = (32, 20, 11)
+
+
+def _unique_rows_chunked(chunks: Iterable[pd.DataFrame], cols: List[str]) -> pd.DataFrame:
+    """
+    Filas únicas de cols a lo largo de varios bloques, en orden de primera aparición.
+    
+    Cada columna mantiene un diccionario estable entre bloques (los valores
+    nuevos se añaden al final; los códigos se obtienen con get_indexer) y
+    cada terna se empaqueta en una clave int64 de anchos fijos. Un set de
+    claves vistas descarta las filas ya aceptadas, así que cada bloque solo
+    cuesta O(filas del bloque) y no se vuelve a procesar lo acumulado.
+    """
+    dictionaries = [None] * len(cols)
+    categories = [None] * len(cols)
+    seen = set()
+    code_parts = []
+    label_parts = []
+    
+    for chunk in chunks:
+        missing = [col for col in cols if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Columnas faltantes: {missing}")
+        
+        codes = []
+        for k, col in enumerate(cols):
+            values = chunk[col]
+            # Categóricas: se acumula la unión de categorías para restaurar el
+            # dtype al final; el diccionario trabaja con los valores
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                cats = values.cat.categories
+                categories[k] = cats if categories[k] is None else \
+                    categories[k].append(cats.difference(categories[k], sort=False))
+                values = values.astype(object)
+            
+            if dictionaries[k] is None:
+                dictionaries[k] = pd.Index(pd.unique(values))
+            col_codes = dictionaries[k].get_indexer(values)
+            unseen = col_codes < 0
+            if unseen.any():
+                dictionaries[k] = dictionaries[k].append(pd.Index(pd.unique(values[unseen])))
+                col_codes[unseen] = dictionaries[k].get_indexer(values[unseen])
+            
+            if len(dictionaries[k]) > 2 ** _CHUNK_KEY_BITS[k]:
+                raise ValueError(f"Columna {col}: demasiados valores distintos para la clave empaquetada")
+            codes.append(col_codes.astype(np.int64))
+        
+        key = (codes[0] << (_CHUNK_KEY_BITS[1] + _CHUNK_KEY_BITS[2])) | (codes[1] << _CHUNK_KEY_BITS[2]) | codes[2]
+        
+        # Únicas del bloque (vectorizado) y luego solo las no vistas antes
+        chunk_keys, first_idx = np.unique(key, return_index=True)
+        is_new = np.fromiter((k not in seen for k in chunk_keys.tolist()), dtype=bool, count=len(chunk_keys))
+        seen.update(chunk_keys[is_new].tolist())
+        
+        positions = np.sort(first_idx[is_new])
+        code_parts.append(np.column_stack([col_codes[positions] for col_codes in codes]))
+        label_parts.append(chunk.index[positions])
+    
+    if not code_parts:
+        return pd.DataFrame(columns=cols)
+    
+    all_codes = np.concatenate(code_parts)
+    data = {}
+    for k, col in enumerate(cols):
+        values = dictionaries[k].take(all_codes[:, k])
+        if categories[k] is not None:
+            values = pd.Categorical(values, categories=categories[k])
+        data[col] = values
+    
+    return pd.DataFrame(data, index=label_parts[0].append(label_parts[1:]))
+
 
 def create_bipartite_edges(
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
     person_col: str = 'PERSONA',
     service_col: str = 'TIPO DE SERVICIO',
     year_col: str = 'AÑO'
@@ -22,7 +126,9 @@ def create_bipartite_edges(
     Crea lista de aristas para red bipartita Persona-Servicio.
     
     Args:
-        df: DataFrame con datos limpios.
+        df: DataFrame con datos limpios, o iterable de DataFrames por bloques
+            (ej. read_data_file_chunked); en ese caso se deduplica bloque a
+            bloque y solo se conservan las aristas únicas acumuladas.
         person_col: Nombre de columna de personas.
         service_col: Nombre de columna de servicios.
         year_col: Nombre de columna de año.
@@ -32,15 +138,18 @@ def create_bipartite_edges(
     """
     logger.info("Creando aristas bipartitas Persona-Servicio")
     
-    # Verificar columnas
     required_cols = [person_col, service_col, year_col]
-    missing = [col for col in required_cols if col not in df.columns]
-    if missing:
-        raise ValueError(f"Columnas faltantes: {missing}")
     
-    # Crear aristas únicas
-    edges = df[[person_col, service_col, year_col]].copy()
-    edges = edges.drop_duplicates()
+    if isinstance(df, pd.DataFrame):
+        # Verificar columnas
+        missing = [col for col in required_cols if col not in df.columns]
+        if missing:
+            raise ValueError(f"Columnas faltantes: {missing}")
+        
+        # Crear aristas únicas
+        edges = _unique_rows(df, required_cols)
+    else:
+        edges = _unique_rows_chunked(df, required_cols)
     
     # Renombrar para claridad
     edges.columns = ['persona', 'servicio', 'anio']
@@ -72,9 +181,11 @@ def create_bipartite_graph(edges_df: pd.DataFrame) -> nx.Graph:
     servicios = edges_df['servicio'].unique()
     G.add_nodes_from(servicios, bipartite=1, node_type='servicio')
     
-    # Añadir aristas
-    for _, row in edges_df.iterrows():
-        G.add_edge(row['persona'], row['servicio'], anio=row['anio'])
+    # Añadir aristas en una sola llamada, sin construir una Serie por fila
+    p = edges_df['persona'].to_numpy()
+    sv = edges_df['servicio'].to_numpy()
+    a = edges_df['anio'].to_numpy()
+    G.add_edges_from((pi, si, {'anio': ai}) for pi, si, ai in zip(p, sv, a))
     
     logger.info(f"Grafo bipartito: {G.number_of_nodes()} nodos, {G.number_of_edges()} aristas")
     logger.info(f"  Personas: {len(personas)}, Servicios: {len(servicios)}")
@@ -82,57 +193,242 @@ def create_bipartite_graph(edges_df: pd.DataFrame) -> nx.Graph:
     return G
 
 
-def project_client_client(
+def bipartite_incidence_matrix(
     bipartite_graph: nx.Graph
+) -> Tuple[scipy.sparse.csr_array, np.ndarray, np.ndarray]:
+    """
+    Construye la matriz de incidencia dispersa B (personas x servicios).
+    
+    Args:
+        bipartite_graph: Grafo bipartito (personas con bipartite=0).
+        
+    Returns:
+        Tupla (B en formato CSR, nombres de personas, nombres de servicios);
+        la fila i de B es la persona i y la columna j el servicio j.
+    """
+    # Separar nodos de personas (bipartite=0) y servicios
+    personas = []
+    servicios = []
+    for n, d in bipartite_graph.nodes(data=True):
+        if d.get('bipartite') == 0:
+            personas.append(n)
+        else:
+            servicios.append(n)
+    persona_idx = {p: i for i, p in enumerate(personas)}
+    servicio_idx = {sv: j for j, sv in enumerate(servicios)}
+    
+    rows = []
+    cols = []
+    for u, v in bipartite_graph.edges():
+        if u not in persona_idx:
+            u, v = v, u
+        rows.append(persona_idx[u])
+        cols.append(servicio_idx[v])
+    B = scipy.sparse.csr_array(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(personas), len(servicios))
+    )
+    B.sort_indices()
+    
+    return B, np.array(personas, dtype=object), np.array(servicios, dtype=object)
+
+
+def bipartite_incidence_from_edges(
+    edges_df: pd.DataFrame
+) -> Tuple[scipy.sparse.csr_array, np.ndarray, np.ndarray]:
+    """
+    Construye B directamente desde la lista de aristas, sin recorrer un grafo.
+    
+    Equivale a bipartite_incidence_matrix(create_bipartite_graph(edges_df)):
+    mismo orden de personas y servicios (primera aparición) y entradas
+    binarias aunque un par persona-servicio se repita en varios años.
+    
+    Args:
+        edges_df: DataFrame con columnas (persona, servicio, anio).
+        
+    Returns:
+        Tupla (B en formato CSR, nombres de personas, nombres de servicios).
+    """
+    persona_codes, personas = pd.factorize(edges_df['persona'], sort=False, use_na_sentinel=False)
+    servicio_codes, servicios = pd.factorize(edges_df['servicio'], sort=False, use_na_sentinel=False)
+    B = scipy.sparse.csr_array(
+        (np.ones(len(edges_df), dtype=np.int32), (persona_codes, servicio_codes)),
+        shape=(len(personas), len(servicios))
+    )
+    # Pares repetidos (distintos años) se suman al convertir; binarizar
+    B.sum_duplicates()
+    B.data[:] = 1
+    
+    return B, np.asarray(personas, dtype=object), np.asarray(servicios, dtype=object)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _row_cooccurrence(i, indptr, indices, t_indptr, t_indices, counts, touched):
+        """Cuenta servicios compartidos de la persona i con cada j > i; devuelve cuántos j."""
+        n_touched = 0
+        for s_pos in range(indptr[i], indptr[i + 1]):
+            s = indices[s_pos]
+            # Fila s de Bᵀ: personas que usan el servicio s
+            for j_pos in range(t_indptr[s], t_indptr[s + 1]):
+                j = t_indices[j_pos]
+                if j > i:
+                    if counts[j] == 0:
+                        touched[n_touched] = j
+                        n_touched += 1
+                    counts[j] += 1
+        return n_touched
+
+    @njit(parallel=True, cache=True)
+    def _project_csr_numba(indptr, indices, t_indptr, t_indices, n_personas, n_blocks):
+        """Triángulo superior de B·Bᵀ en COO; un bloque de filas por hilo."""
+        # Cada bloque reutiliza su acumulador denso y solo limpia lo tocado,
+        # así la memoria extra es O(hilos·P) y no O(P²)
+        nnz = np.zeros(n_personas, np.int64)
+        for b in prange(n_blocks):
+            counts = np.zeros(n_personas, np.int64)
+            touched = np.empty(n_personas, np.int64)
+            for i in range(b * n_personas // n_blocks, (b + 1) * n_personas // n_blocks):
+                n_touched = _row_cooccurrence(i, indptr, indices, t_indptr, t_indices, counts, touched)
+                nnz[i] = n_touched
+                for k in range(n_touched):
+                    counts[touched[k]] = 0
+        
+        offsets = np.zeros(n_personas + 1, np.int64)
+        offsets[1:] = np.cumsum(nnz)
+        rows = np.empty(offsets[-1], np.int64)
+        cols = np.empty(offsets[-1], np.int64)
+        weights = np.empty(offsets[-1], np.int64)
+        
+        for b in prange(n_blocks):
+            counts = np.zeros(n_personas, np.int64)
+            touched = np.empty(n_personas, np.int64)
+            for i in range(b * n_personas // n_blocks, (b + 1) * n_personas // n_blocks):
+                n_touched = _row_cooccurrence(i, indptr, indices, t_indptr, t_indices, counts, touched)
+                # Columnas ordenadas dentro de cada fila, como el COO de scipy
+                js = np.sort(touched[:n_touched])
+                for k in range(n_touched):
+                    pos = offsets[i] + k
+                    rows[pos] = i
+                    cols[pos] = js[k]
+                    weights[pos] = counts[js[k]]
+                for k in range(n_touched):
+                    counts[js[k]] = 0
+        
+        return rows, cols, weights
+
+
+def project_client_client_weights(
+    B: scipy.sparse.csr_array
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calcula los pares de personas con servicios en común y su peso.
+    
+    Args:
+        B: Matriz de incidencia de bipartite_incidence_matrix.
+        
+    Returns:
+        Tupla (índices i, índices j, pesos) con i < j.
+    """
+    # Con numba: kernel paralelo sobre B y Bᵀ en CSR, sin materializar B·Bᵀ
+    # completo (ambos triángulos y la diagonal)
+    if njit is not None and B.shape[0] > 0:
+        Bt = B.T.tocsr()
+        return _project_csr_numba(
+            B.indptr, B.indices, Bt.indptr, Bt.indices,
+            B.shape[0], min(get_num_threads(), B.shape[0])
+        )
+    
+    # W = B·Bᵀ: cada no-cero fuera de la diagonal es el número de servicios
+    # compartidos por un par; el triángulo superior da cada par una sola vez
+    W = scipy.sparse.triu(B @ B.T, k=1, format='coo')
+    
+    # Mismo orden y tipos (int64) que el kernel numba: por fila y, dentro
+    # de ella, por columna
+    order = np.lexsort((W.col, W.row))
+    return (
+        W.row[order].astype(np.int64),
+        W.col[order].astype(np.int64),
+        W.data[order].astype(np.int64)
+    )
+
+
+def get_shared_services(
+    i: int,
+    j: int,
+    B: scipy.sparse.csr_array,
+    servicio_names: np.ndarray
+) -> List[Any]:
+    """
+    Servicios compartidos por las personas i y j (calculados bajo demanda).
+    
+    Args:
+        i: Índice de la primera persona (fila de B).
+        j: Índice de la segunda persona (fila de B).
+        B: Matriz de incidencia de bipartite_incidence_matrix.
+        servicio_names: Nombres de servicios de bipartite_incidence_matrix.
+        
+    Returns:
+        Lista de servicios compartidos.
+    """
+    shared = np.intersect1d(
+        B.indices[B.indptr[i]:B.indptr[i + 1]],
+        B.indices[B.indptr[j]:B.indptr[j + 1]],
+        assume_unique=True
+    )
+    return servicio_names[shared].tolist()
+
+
+def project_client_client(
+    bipartite_graph: nx.Graph,
+    edges_df: pd.DataFrame = None
 ) -> Tuple[nx.Graph, pd.DataFrame]:
     """
     Proyecta el grafo bipartito a una red cliente-cliente ponderada.
     El peso es el número de servicios compartidos.
     
+    Los servicios compartidos de cada par no se materializan; pueden
+    obtenerse con get_shared_services sobre bipartite_incidence_matrix.
+    
     Args:
         bipartite_graph: Grafo bipartito.
+        edges_df: Aristas bipartitas con las que se construyó el grafo
+            (opcional); si se pasan, B se arma con factorize sobre sus
+            columnas en lugar de recorrer las aristas del grafo. Las
+            personas del grafo sin aristas en edges_df se conservan como
+            nodos aislados.
         
     Returns:
         Tupla (grafo proyectado, DataFrame de aristas con pesos).
     """
     logger.info("Proyectando red cliente-cliente")
     
-    # Obtener nodos de personas (bipartite=0)
-    personas = {n for n, d in bipartite_graph.nodes(data=True) if d.get('bipartite') == 0}
+    if edges_df is not None:
+        B, personas, _ = bipartite_incidence_from_edges(edges_df)
+    else:
+        B, personas, _ = bipartite_incidence_matrix(bipartite_graph)
+    rows, cols, weights = project_client_client_weights(B)
+    p1 = personas[rows]
+    p2 = personas[cols]
+    pesos = weights.tolist()
     
     # Crear proyección ponderada
-    # El peso es el número de vecinos (servicios) compartidos
     G_proj = nx.Graph()
     G_proj.add_nodes_from(personas)
-    
-    # Calcular pesos
-    edges_with_weights = []
-    
-    personas_list = list(personas)
-    for i, p1 in enumerate(personas_list):
-        # Servicios de p1
-        servicios_p1 = set(bipartite_graph.neighbors(p1))
-        
-        for p2 in personas_list[i+1:]:
-            # Servicios de p2
-            servicios_p2 = set(bipartite_graph.neighbors(p2))
-            
-            # Servicios compartidos
-            shared = servicios_p1.intersection(servicios_p2)
-            
-            if len(shared) > 0:
-                weight = len(shared)
-                G_proj.add_edge(p1, p2, weight=weight)
-                edges_with_weights.append({
-                    'persona1': p1,
-                    'persona2': p2,
-                    'peso': weight,
-                    'servicios_compartidos': list(shared)
-                })
+    if edges_df is not None:
+        # Personas del grafo ausentes en edges_df (ej. nodos aislados)
+        G_proj.add_nodes_from(
+            n for n, part in bipartite_graph.nodes(data='bipartite') if part == 0
+        )
+    G_proj.add_weighted_edges_from(zip(p1, p2, pesos))
     
     logger.info(f"Proyección cliente-cliente: {G_proj.number_of_nodes()} nodos, {G_proj.number_of_edges()} aristas")
     
-    edges_df = pd.DataFrame(edges_with_weights)
+    edges_df = pd.DataFrame({
+        'persona1': p1,
+        'persona2': p2,
+        'peso': weights
+    })
     
     return G_proj, edges_df
 
@@ -164,7 +460,7 @@ def export_network_data(
     proyeccion_path = processed_path / config['outputs']['proyeccion_cc_ponderada']
     
     # Simplificar formato de proyección para exportar
-    edges_export = edges_proyeccion[['persona1', 'persona2', 'peso']].copy()
+    edges_export = edges_proyeccion[['persona1', 'persona2', 'peso']]
     edges_export.to_csv(proyeccion_path, index=False, encoding='utf-8')
     logger.info(f"Proyección cliente-cliente exportada: {proyeccion_path}")
 
@@ -194,7 +490,7 @@ def prepare_networks(
     G_bipartito = create_bipartite_graph(edges_bipartita)
     
     # 3. Proyectar cliente-cliente
-    G_proyeccion, edges_proyeccion = project_client_client(G_bipartito)
+    G_proyeccion, edges_proyeccion = project_client_client(G_bipartito, edges_bipartita)
     
     # 4. Exportar datos
     export_network_data(edges_bipartita, edges_proyeccion, processed_path, config)
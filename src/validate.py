@@ -12,57 +12,108 @@ logger = logging.getLogger(__name__)
 
 
 class ValidationReport:
-    """Reporte estructurado de validación de datos."""
+    """
+    Reporte estructurado de validación de datos.
+    
+    Los issues se registran con add_error/add_warning y los reportes se
+    combinan con merge(). errors y warnings son vistas de solo lectura
+    (tuplas construidas bajo demanda): no admiten append/extend.
+    """
     
     def __init__(self):
-        self.errors: List[Dict[str, Any]] = []
-        self.warnings: List[Dict[str, Any]] = []
+        # Almacenamiento columnar: listas paralelas categoría/mensaje/detalles
+        self._err_cat: List[str] = []
+        self._err_msg: List[str] = []
+        self._err_det: List[Any] = []
+        self._warn_cat: List[str] = []
+        self._warn_msg: List[str] = []
+        self._warn_det: List[Any] = []
         self.passed: bool = True
     
     def add_error(self, category: str, message: str, details: Any = None):
         """Añade un error crítico."""
-        self.errors.append({
-            'category': category,
-            'message': message,
-            'details': details
-        })
+        self._err_cat.append(category)
+        self._err_msg.append(message)
+        self._err_det.append(details)
         self.passed = False
     
     def add_warning(self, category: str, message: str, details: Any = None):
         """Añade una advertencia."""
-        self.warnings.append({
-            'category': category,
-            'message': message,
-            'details': details
-        })
+        self._warn_cat.append(category)
+        self._warn_msg.append(message)
+        self._warn_det.append(details)
+    
+    def merge(self, other: 'ValidationReport'):
+        """Incorpora los errores, advertencias y estado de otro reporte."""
+        self._err_cat.extend(other._err_cat)
+        self._err_msg.extend(other._err_msg)
+        self._err_det.extend(other._err_det)
+        self._warn_cat.extend(other._warn_cat)
+        self._warn_msg.extend(other._warn_msg)
+        self._warn_det.extend(other._warn_det)
+        self.passed = self.passed and other.passed
+    
+    @property
+    def n_errors(self) -> int:
+        """Número de errores."""
+        return len(self._err_cat)
+    
+    @property
+    def n_warnings(self) -> int:
+        """Número de advertencias."""
+        return len(self._warn_cat)
+    
+    @staticmethod
+    def _as_dicts(cats: List[str], msgs: List[str], dets: List[Any]) -> Tuple[Dict[str, Any], ...]:
+        """Reconstruye los diccionarios a partir de las listas paralelas."""
+        return tuple(
+            {'category': c, 'message': m, 'details': d}
+            for c, m, d in zip(cats, msgs, dets)
+        )
+    
+    def to_dicts(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Convierte errores y advertencias a listas de diccionarios."""
+        return {'errors': list(self.errors), 'warnings': list(self.warnings)}
+    
+    @property
+    def errors(self) -> Tuple[Dict[str, Any], ...]:
+        """Errores como tupla de diccionarios (solo lectura; usar add_error)."""
+        return self._as_dicts(self._err_cat, self._err_msg, self._err_det)
+    
+    @property
+    def warnings(self) -> Tuple[Dict[str, Any], ...]:
+        """Advertencias como tupla de diccionarios (solo lectura; usar add_warning)."""
+        return self._as_dicts(self._warn_cat, self._warn_msg, self._warn_det)
     
     def get_summary(self) -> str:
         """Genera resumen del reporte."""
         summary = []
         summary.append(f"Estado: {'✓ APROBADO' if self.passed else '✗ RECHAZADO'}")
-        summary.append(f"Errores: {len(self.errors)}")
-        summary.append(f"Advertencias: {len(self.warnings)}")
+        summary.append(f"Errores: {self.n_errors}")
+        summary.append(f"Advertencias: {self.n_warnings}")
         return "\n".join(summary)
     
     def print_report(self, logger_obj: logging.Logger = None):
         """Imprime el reporte completo."""
+        if logger_obj is not None and not logger_obj.isEnabledFor(logging.INFO):
+            return
         log_func = logger_obj.info if logger_obj else print
         
         log_func(self.get_summary())
         
-        if self.errors:
+        if self._err_cat:
             log_func("\nErrores detectados:")
-            for err in self.errors:
-                log_func(f"  [{err['category']}] {err['message']}")
-                if err['details']:
-                    log_func(f"    Detalles: {err['details']}")
+            for cat, msg, det in zip(self._err_cat, self._err_msg, self._err_det):
+                log_func(f"  [{cat}] {msg}")
+                if det:
+                    log_func(f"    Detalles: {det}")
         
-        if self.warnings:
+        if self._warn_cat:
             log_func("\nAdvertencias:")
-            for warn in self.warnings:
-                log_func(f"  [{warn['category']}] {warn['message']}")
-                if warn['details']:
-                    log_func(f"    Detalles: {warn['details']}")
+            for cat, msg, det in zip(self._warn_cat, self._warn_msg, self._warn_det):
+                log_func(f"  [{cat}] {msg}")
+                if det:
+                    log_func(f"    Detalles: {det}")
 
 
 def validate_schema(
@@ -83,22 +134,23 @@ def validate_schema(
     """
     report = ValidationReport()
     
-    # Validar columnas presentes
-    missing_cols = set(expected_columns) - set(df.columns)
-    extra_cols = set(df.columns) - set(expected_columns)
+    # Validar columnas presentes (operaciones de conjunto de Index)
+    expected = pd.Index(expected_columns)
+    missing_cols = expected.difference(df.columns).tolist()
+    extra_cols = df.columns.difference(expected).tolist()
     
     if missing_cols:
         report.add_error(
             'SCHEMA',
             f'Columnas faltantes: {missing_cols}',
-            list(missing_cols)
+            missing_cols
         )
     
     if extra_cols:
         report.add_warning(
             'SCHEMA',
             f'Columnas extras no esperadas: {extra_cols}',
-            list(extra_cols)
+            extra_cols
         )
     
     # Validar tipos si se especifican
@@ -118,13 +170,14 @@ def validate_schema(
                         f'Columna {col}: esperado tipo string, encontrado {actual_dtype}'
                     )
     
-    logger.info(f"Validación de esquema: {len(report.errors)} errores, {len(report.warnings)} advertencias")
+    logger.info(f"Validación de esquema: {report.n_errors} errores, {report.n_warnings} advertencias")
     return report
 
 
 def validate_domains(
     df: pd.DataFrame,
-    domain_config: Dict[str, List[str]]
+    domain_config: Dict[str, List[str]],
+    null_mask: pd.DataFrame = None
 ) -> ValidationReport:
     """
     Valida que las columnas categóricas tengan valores dentro de dominios permitidos.
@@ -132,6 +185,8 @@ def validate_domains(
     Args:
         df: DataFrame a validar.
         domain_config: Diccionario columna -> lista de valores permitidos.
+        null_mask: Máscara df.isna() ya calculada (opcional); se usa para las
+            columnas que contenga en lugar de volver a recorrerlas.
         
     Returns:
         ValidationReport con resultados.
@@ -143,23 +198,34 @@ def validate_domains(
             report.add_warning('DOMAIN', f'Columna {col} no existe en el DataFrame')
             continue
         
-        # Valores únicos presentes (excluyendo nulos)
-        unique_vals = df[col].dropna().unique()
-        invalid_vals = set(unique_vals) - set(allowed_values)
+        col_vals = df[col]
+        
+        # Categórica cuyo diccionario ya está dentro del dominio: nada que revisar
+        if isinstance(col_vals.dtype, pd.CategoricalDtype) and \
+                col_vals.cat.categories.isin(allowed_values).all():
+            continue
         
-        if invalid_vals:
-            count = df[col].isin(invalid_vals).sum()
+        # Una sola pasada: máscara de valores no nulos fuera del dominio
+        if null_mask is not None and col in null_mask.columns:
+            not_null = ~null_mask[col]
+        else:
+            not_null = col_vals.notna()
+        mask = not_null & ~col_vals.isin(allowed_values)
+        count = int(mask.sum())
+        
+        if count:
+            invalid_vals = col_vals[mask].unique().tolist()
             report.add_error(
                 'DOMAIN',
                 f'Columna {col}: {count} registros con valores fuera del dominio',
                 {
-                    'valores_invalidos': list(invalid_vals),
+                    'valores_invalidos': invalid_vals,
                     'valores_permitidos': allowed_values,
                     'registros_afectados': count
                 }
             )
     
-    logger.info(f"Validación de dominios: {len(report.errors)} errores")
+    logger.info(f"Validación de dominios: {report.n_errors} errores")
     return report
 
 
@@ -185,9 +251,10 @@ def validate_duplicates(
         report.add_error('DUPLICATES', f'Columnas clave faltantes: {missing_keys}')
         return report
     
-    # Detectar duplicados
-    duplicated = df.duplicated(subset=key_columns, keep=False)
-    n_duplicated = duplicated.sum()
+    # Detectar duplicados: tamaños de grupo por clave (tabla hash), sin
+    # construir una máscara booleana del tamaño del DataFrame
+    sizes = df.groupby(key_columns, sort=False, dropna=False, observed=True).size()
+    n_duplicated = int(sizes[sizes > 1].sum())
     
     if n_duplicated > 0:
         report.add_error(
@@ -202,7 +269,8 @@ def validate_duplicates(
 
 def validate_nulls(
     df: pd.DataFrame,
-    required_columns: List[str] = None
+    required_columns: List[str] = None,
+    nulls: pd.Series = None
 ) -> ValidationReport:
     """
     Valida valores nulos en columnas requeridas.
@@ -210,6 +278,7 @@ def validate_nulls(
     Args:
         df: DataFrame a validar.
         required_columns: Columnas que no deben tener nulos. Si None, aplica a todas.
+        nulls: Conteo de nulos por columna ya calculado (ej. df.isna().sum()), opcional.
         
     Returns:
         ValidationReport con resultados.
@@ -217,12 +286,14 @@ def validate_nulls(
     report = ValidationReport()
     
     cols_to_check = required_columns if required_columns else df.columns
+    cols_to_check = [col for col in cols_to_check if col in df.columns]
+    
+    # Un solo conteo vectorizado; el bucle recorre solo la Serie resultante
+    if nulls is None:
+        nulls = df[cols_to_check].isna().sum()
     
     for col in cols_to_check:
-        if col not in df.columns:
-            continue
-        
-        n_nulls = df[col].isnull().sum()
+        n_nulls = int(nulls[col])
         if n_nulls > 0:
             pct = (n_nulls / len(df)) * 100
             report.add_error(
@@ -231,14 +302,15 @@ def validate_nulls(
                 {'n_nulos': n_nulls, 'porcentaje': pct}
             )
     
-    logger.info(f"Validación de nulos: {len(report.errors)} columnas con nulos")
+    logger.info(f"Validación de nulos: {report.n_errors} columnas con nulos")
     return report
 
 
 def full_validation(
     df: pd.DataFrame,
     config: Dict[str, Any],
-    key_columns: List[str] = None
+    key_columns: List[str] = None,
+    nulls: pd.Series = None
 ) -> ValidationReport:
     """
     Ejecuta todas las validaciones según configuración.
@@ -247,6 +319,8 @@ def full_validation(
         df: DataFrame a validar.
         config: Diccionario de configuración del proyecto.
         key_columns: Columnas clave para detección de duplicados.
+        nulls: Conteo de nulos por columna ya calculado (ej. el de
+            profile_dataframe), opcional.
         
     Returns:
         ValidationReport combinado con todos los resultados.
@@ -255,30 +329,30 @@ def full_validation(
     
     combined_report = ValidationReport()
     
-    # 1. Validar esquema
-    schema_report = validate_schema(df, config['columns_expected'])
-    combined_report.errors.extend(schema_report.errors)
-    combined_report.warnings.extend(schema_report.warnings)
-    combined_report.passed = combined_report.passed and schema_report.passed
+    # Máscara de nulos calculada una sola vez: la usan dominios y nulos
+    check_cols = [col for col in dict.fromkeys([*config['columns_expected'], *config['domains']])
+                  if col in df.columns]
+    null_mask = df[check_cols].isna()
+    if nulls is None:
+        nulls = null_mask.sum()
     
-    # 2. Validar dominios
-    domain_report = validate_domains(df, config['domains'])
-    combined_report.errors.extend(domain_report.errors)
-    combined_report.warnings.extend(domain_report.warnings)
-    combined_report.passed = combined_report.passed and domain_report.passed
+    reports = [
+        # 1. Validar esquema
+        validate_schema(df, config['columns_expected']),
+        # 2. Validar dominios
+        validate_domains(df, config['domains'], null_mask=null_mask),
+    ]
     
     # 3. Validar duplicados si se especifican columnas clave
     if key_columns:
-        dup_report = validate_duplicates(df, key_columns)
-        combined_report.errors.extend(dup_report.errors)
-        combined_report.warnings.extend(dup_report.warnings)
-        combined_report.passed = combined_report.passed and dup_report.passed
+        reports.append(validate_duplicates(df, key_columns))
     
     # 4. Validar nulos en columnas críticas
-    null_report = validate_nulls(df, config['columns_expected'])
-    combined_report.errors.extend(null_report.errors)
-    combined_report.warnings.extend(null_report.warnings)
-    combined_report.passed = combined_report.passed and null_report.passed
+    reports.append(validate_nulls(df, config['columns_expected'], nulls=nulls))
+    
+    for report in reports:
+        combined_report.merge(report)
     
-    logger.info(f"Validación completa finalizada: {combined_report.get_summary()}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Validación completa finalizada: %s", combined_report.get_summary())
     return combined_report
@@ -0,0 +1,18 @@
+"""
+Regresiones de lectura de datos (io_utils).
+"""
+
+from src.io_utils import read_data_file
+
+
+def test_read_data_file_keeps_leading_zero_ids(tmp_path):
+    """Los IDs con ceros a la izquierda se conservan al leer como texto."""
+    csv_path = tmp_path / 'datos.csv'
+    csv_path.write_text('PERSONA,ID,FECHA\n00123,007,2020-01-05\n', encoding='utf-8')
+
+    for engine in (None, 'pyarrow'):
+        df = read_data_file(csv_path, dtype={'PERSONA': 'string', 'ID': str, 'FECHA': str}, engine=engine)
+
+        assert df.loc[0, 'PERSONA'] == '00123'
+        assert df.loc[0, 'ID'] == '007'
+        assert df.loc[0, 'FECHA'] == '2020-01-05'